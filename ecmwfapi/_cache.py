@@ -0,0 +1,68 @@
+#
+# (C) Copyright 2012-2013 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""Small on-disk cache of JSON values, with a time to live.
+
+Failing to read or write the cache is never an error: the value is simply
+fetched again.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ecmwfapi", "cache")
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, "%s.json" % (key,))
+
+
+def get(key, ttl):
+    """Return the value stored under key, or None if there is none, or if it
+    is older than ttl seconds.
+    """
+    if ttl <= 0:
+        return None
+    path = _path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def put(key, value):
+    tmp = None
+    try:
+        if not os.path.isdir(CACHE_DIR):
+            os.makedirs(CACHE_DIR, 0o700)
+        # Write to a temporary file and rename it, so that readers never see
+        # a partially written entry
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp, _path(key))
+    except (IOError, OSError, TypeError, ValueError):
+        if tmp is not None:
+            _delete_file(tmp)
+
+
+def delete(key):
+    _delete_file(_path(key))
+
+
+def _delete_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
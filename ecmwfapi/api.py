@@ -10,9 +10,17 @@
 # make the python3-like print behave in python 2
 from __future__ import print_function
 
+import base64
+import collections
+import hashlib
 import json
+import math
 import os
+import random
+import re
+import socket
 import sys
+import threading
 import time
 import traceback
 import textwrap
@@ -25,24 +33,72 @@ try:
     from urllib.error import HTTPError, URLError
     from urllib.request import (
         HTTPRedirectHandler,
+        HTTPSHandler,
         Request,
         build_opener,
-        urlopen,
         addinfourl,
+        getproxies,
+        proxy_bypass,
+    )
+    from urllib.parse import unquote
+    from http.client import (
+        BadStatusLine,
+        HTTPConnection,
+        HTTPException,
+        HTTPSConnection,
     )
-    from http.client import BadStatusLine
 except ImportError:
     from urlparse import urlparse
     from urlparse import urljoin
     from urllib2 import HTTPError, URLError
-    from urllib2 import HTTPRedirectHandler, Request, build_opener, urlopen, addinfourl
-    from httplib import BadStatusLine
+    from urllib2 import HTTPRedirectHandler, HTTPSHandler, Request, build_opener
+    from urllib2 import addinfourl
+    from urllib import getproxies, proxy_bypass, unquote
+    from httplib import BadStatusLine, HTTPConnection, HTTPException, HTTPSConnection
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+try:
+    from functools import lru_cache
+except ImportError:
+    # Python 2: no caching
+    def lru_cache(maxsize=128):
+        return lambda func: func
+
 
 try:
     import ssl
 except ImportError:
     sys.exit("Python socket module was not compiled with SSL support. Aborting...")
 
+# Loading the CA certificates is costly, so all connections share one context
+_SSL_CONTEXT = ssl.create_default_context()
+
+# Opener used for downloads. It keeps no state between requests, so it can be
+# shared by threads.
+_OPENER = build_opener(HTTPSHandler(context=_SSL_CONTEXT))
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+else:
+    import importlib.util
+
+    # httpx needs h2 to speak HTTP/2
+    if importlib.util.find_spec("h2") is None:
+        httpx = None
+
+from ecmwfapi import _cache
+
 
 VERSION = "1.6.3"
 
@@ -55,6 +111,47 @@ ANONYMOUS_APIKEY_VALUES = (
 )
 
 
+# JSON (de)serialisation, with orjson when available as it is much faster
+def _json_dumps(obj):
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_dumps_pretty(obj):
+    return json.dumps(obj, indent=4)
+
+
+if orjson is not None:
+
+    def _orjson_dumps(obj):
+        try:
+            data = orjson.dumps(obj)
+        except TypeError:  # e.g. non-string keys, which json converts
+            return _json_dumps(obj)
+        # orjson writes NaN and infinities as null, where json writes NaN and
+        # Infinity, so any null could be one of them
+        if b"null" in data:
+            return _json_dumps(obj)
+        return data
+
+    def _orjson_loads(data):
+        try:
+            return orjson.loads(data)
+        except ValueError:  # e.g. NaN, which json reads
+            return json.loads(data)
+
+    def _orjson_dumps_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+
+    _dumps = _orjson_dumps
+    _dumps_pretty = _orjson_dumps_pretty
+    _loads = _orjson_loads
+
+else:
+    _dumps = _json_dumps
+    _dumps_pretty = _json_dumps_pretty
+    _loads = json.loads
+
+
 class APIKeyNotFoundError(Exception):
     pass
 
@@ -78,9 +175,25 @@ def get_apikey_values_from_environ():
         return apikey_values
 
 
+# API key values read from rc files, keyed by path and modification time so
+# that edits to the file are picked up
+_rcfile_cache = {}
+
+
 def get_apikey_values_from_rcfile(rcfile_path):
     rcfile_path = os.path.normpath(os.path.expanduser(rcfile_path))
 
+    try:
+        st = os.stat(rcfile_path)
+        # st_mtime_ns is missing on Python 2
+        mtime = getattr(st, "st_mtime_ns", st.st_mtime)
+        cache_key = (rcfile_path, mtime, st.st_size)
+    except OSError:  # Errors are reported by reading the file below
+        cache_key = None
+    else:
+        if cache_key in _rcfile_cache:
+            return _rcfile_cache[cache_key]
+
     try:
         with open(rcfile_path) as f:
             apikey = json.load(f)
@@ -96,11 +209,14 @@ def get_apikey_values_from_rcfile(rcfile_path):
         raise APIKeyFetchError(str(e))
     else:
         try:
-            return (apikey["key"], apikey["url"], apikey["email"])
+            apikey_values = (apikey["key"], apikey["url"], apikey["email"])
         except:
             raise APIKeyFetchError(
                 "ERROR: Missing or malformed API key in '%s'" % rcfile_path
             )
+        if cache_key is not None:
+            _rcfile_cache[cache_key] = apikey_values
+        return apikey_values
 
 
 def get_apikey_values():
@@ -157,9 +273,10 @@ def get_apikey_values():
 
 
 class RetryError(Exception):
-    def __init__(self, code, text):
+    def __init__(self, code, text, headers=None):
         self.code = code
         self.text = text
+        self.headers = headers
 
     def __str__(self):
         return "%d %s" % (self.code, self.text)
@@ -173,10 +290,39 @@ class APIException(Exception):
         return repr(self.value)
 
 
+class ResumeFailedError(Exception):
+    def __init__(self, size, expected):
+        self.size = size
+        self.expected = expected
+
+    def __str__(self):
+        return "Transferred %d bytes, expected %d" % (self.size, self.expected)
+
+
+def max_retries():
+    # At least one try, and the default of 10 if the setting is not a number
+    try:
+        return max(1, int(os.getenv("ECMWF_API_MAX_RETRIES", 10)))
+    except ValueError:
+        return 10
+
+
+def retry_delay(attempt, error, base=1.0, cap=60.0):
+    # Exponential backoff, with jitter so that clients do not retry in
+    # lockstep, but no sooner than the server asked for
+    delay = min(cap, base * 2**attempt) + random.uniform(0, base)
+    headers = getattr(error, "headers", None)
+    if headers is not None:
+        try:
+            delay = max(delay, int(headers.get("Retry-After", 0)))
+        except ValueError:  # HTTP-date form, not used by the WebAPI
+            pass
+    return delay
+
+
 def robust(func):
     def wrapped(self, *args, **kwargs):
-        max_tries = tries = 10
-        delay = 60  # retry delay
+        max_tries = tries = max_retries()
         last_error = None
         while tries > 0:
             try:
@@ -207,7 +353,10 @@ def robust(func):
                     self.log("Unexpected error: %s" % sys.exc_info()[0])
                     self.log(traceback.format_exc())
                 raise
-            self.log("Error contacting the WebAPI, retrying in %d seconds ..." % delay)
+            delay = retry_delay(max_tries - tries, last_error)
+            self.log(
+                "Error contacting the WebAPI, retrying in %.1f seconds ..." % delay
+            )
             time.sleep(delay)
             tries -= 1
         # if all retries have been exhausted, raise the last exception caught
@@ -217,6 +366,7 @@ def robust(func):
     return wrapped
 
 
+@lru_cache(maxsize=32)
 def get_api_url(url):
     parsed_uri = urlparse(url)
     return "{uri.scheme}://{uri.netloc}/{apiver}/".format(
@@ -267,10 +417,215 @@ def no_log(msg):
 
 def print_with_timestamp(msg):
     t = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-    print("%s %s" % (t, msg))
+    # Multi-line messages are printed at once, with every line time stamped
+    print("\n".join("%s %s" % (t, line) for line in ("%s" % (msg,)).split("\n")))
+
+
+class _RateLimiter(object):
+    """Limit the number of calls made in a sliding time window, to avoid
+    being answered 429 (Too many requests) by the server.
+
+    The rate is halved on every 429, and grows back by one for every rate
+    successful calls, up to its initial value or to the X-RateLimit-Limit
+    sent by the server. When the server reports that no calls remain, calls
+    wait for X-RateLimit-Reset.
+    """
+
+    # Immune to changes of the system clock
+    _clock = staticmethod(getattr(time, "monotonic", time.time))
+
+    def __init__(self, rate, window):
+        self.rate = self.max_rate = rate
+        self.window = window
+        self._calls = collections.deque()
+        self._successes = 0
+        self._not_before = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a call from the window and return 0 if one is free, otherwise
+        return the number of seconds to wait before trying again.
+        """
+        with self._lock:
+            now = self._clock()
+            while self._calls and self._calls[0] <= now - self.window:
+                self._calls.popleft()
+            delay = self._not_before - now
+            if delay > 0:
+                return delay
+            if len(self._calls) < self.rate:
+                self._calls.append(now)
+                return 0
+            # Wait for enough calls to leave the window
+            oldest = self._calls[len(self._calls) - self.rate]
+            return oldest + self.window - now
+
+    def acquire(self):
+        while True:
+            delay = self.reserve()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def update(self, code, headers):
+        with self._lock:
+            if code == 429:
+                self.rate = max(1, self.rate // 2)
+                self._successes = 0
+            elif code < 400:
+                self._successes += 1
+                if self._successes >= self.rate and self.rate < self.max_rate:
+                    self.rate += 1
+                    self._successes = 0
+
+            try:
+                limit = headers.get("X-RateLimit-Limit")
+                if limit is not None:
+                    self.max_rate = max(1, int(limit))
+                    self.rate = min(self.rate, self.max_rate)
+                if headers.get("X-RateLimit-Remaining") == "0":
+                    reset = float(headers.get("X-RateLimit-Reset", self.window))
+                    if reset > 1e9:  # a time stamp rather than a delay
+                        reset -= time.time()
+                    self._not_before = self._clock() + reset
+            except ValueError:
+                pass
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class _NoRateLimiter(object):
+    """Stands for a _RateLimiter when calls are not throttled."""
+
+    def reserve(self):
+        return 0
+
+    def acquire(self):
+        pass
+
+    def update(self, code, headers):
+        pass
+
+
+def rate_limit():
+    # Calls allowed per minute, 0 or less for no limit
+    try:
+        return int(os.getenv("ECMWF_API_RATE_LIMIT", 120))
+    except ValueError:
+        return 120
+
+
+def _rate_limiter(url, key):
+    """Return the _RateLimiter shared by all the connections of a process
+    using the same URL and key.
+    """
+    rate = rate_limit()
+    if rate <= 0:
+        return _NoRateLimiter()
+    with _rate_limiters_lock:
+        if (url, key) not in _rate_limiters:
+            _rate_limiters[(url, key)] = _RateLimiter(rate, 60.0)
+        return _rate_limiters[(url, key)]
+
+
+_http2 = None
+_http2_lock = threading.Lock()
+
+
+def _http2_client():
+    """Return the httpx client shared by all connections, or None if HTTP/2
+    is not available or was disabled by setting ECMWF_API_HTTP2 to 0.
+    """
+    global _http2
+    if httpx is None or os.getenv("ECMWF_API_HTTP2", "1") == "0":
+        return None
+    with _http2_lock:
+        if _http2 is None:
+            _http2 = httpx.Client(
+                http2=True,
+                verify=_SSL_CONTEXT,
+                timeout=None,
+                limits=httpx.Limits(max_keepalive_connections=20),
+            )
+        return _http2
+
+
+class _HTTPXResponse(object):
+    """Give an httpx response the interface of http.client's used by call()."""
+
+    def __init__(self, res):
+        self.status = res.status_code
+        self.reason = res.reason_phrase
+        self.msg = res.headers
+        self._res = res
+
+    def getheader(self, name, default=None):
+        return self._res.headers.get(name, default)
+
+    def read(self):
+        return self._res.content
+
+    def close(self):
+        self._res.close()
+
+
+def _split_url(url):
+    """Split url into (scheme, netloc, path), the path including the query."""
+    parsed = urlparse(url)
+    path = parsed.path or "/"
+    if parsed.query:
+        path = "%s?%s" % (path, parsed.query)
+    return parsed.scheme, parsed.netloc, path
+
+
+def _new_connection(scheme, netloc):
+    """Return an http.client connection to netloc, going through the proxy
+    configured in the environment (http_proxy, https_proxy, no_proxy) if any,
+    as urllib does.
+
+    Connections through a proxy to plain http servers have their
+    proxy_headers attribute set: requests on them must give the full URL
+    and carry these headers.
+    """
+    proxy = getproxies().get(scheme)
+    if proxy and not proxy_bypass(urlparse("//" + netloc).hostname or netloc):
+        if "://" not in proxy:
+            proxy = "http://" + proxy
+        proxy = urlparse(proxy)
+        proxy_headers = {}
+        if proxy.username:
+            credentials = "%s:%s" % (
+                unquote(proxy.username),
+                unquote(proxy.password or ""),
+            )
+            proxy_headers["Proxy-Authorization"] = "Basic %s" % (
+                base64.b64encode(credentials.encode("utf-8")).decode("ascii"),
+            )
+        proxy_netloc = proxy.hostname
+        if proxy.port:
+            proxy_netloc = "%s:%d" % (proxy_netloc, proxy.port)
+        if scheme == "https":
+            conn = HTTPSConnection(proxy_netloc, context=_SSL_CONTEXT)
+            conn.set_tunnel(netloc, headers=proxy_headers)
+        else:
+            conn = HTTPConnection(proxy_netloc)
+            conn.proxy_headers = proxy_headers
+        return conn
+
+    if scheme == "https":
+        return HTTPSConnection(netloc, context=_SSL_CONTEXT)
+    return HTTPConnection(netloc)
 
 
 class Connection(object):
+
+    # Keep-alive connections keyed by (scheme, netloc), reused across calls so
+    # that polling does not pay for a new TCP and TLS handshake every time.
+    # http.client connections are not thread-safe, hence one pool per thread.
+    _local = threading.local()
+
     def __init__(
         self, url, email=None, key=None, verbose=False, quiet=False, log=no_log
     ):
@@ -286,109 +641,243 @@ class Connection(object):
         self.quiet = quiet
         self.log = log
         self.status = None
+        self._poll_interval = 1.0
+        # Built once, as they are the same for every call. They are passed as
+        # is to the HTTP library, so must not be modified.
+        self._headers_get = {
+            "Accept": "application/json",
+            "From": email,
+            "X-ECMWF-KEY": key,
+        }
+        self._headers_post = dict(self._headers_get)
+        self._headers_post["Content-Type"] = "application/json"
+        self.code = None
+        self._http2 = _http2_client()
+        self._limiter = _rate_limiter(url, key)
+        # self.location split into (scheme, netloc, path), and the Location
+        # header it was resolved from, so that polling parses no URL
+        self._location = None
+        self._location_header = None
+
+    @property
+    def _pool(self):
+        try:
+            return self._local.pool
+        except AttributeError:
+            self._local.pool = {}
+            return self._local.pool
+
+    def _connection(self, scheme, netloc):
+        conn = self._pool.get((scheme, netloc))
+        if conn is None:
+            conn = _new_connection(scheme, netloc)
+            self._pool[(scheme, netloc)] = conn
+        return conn
+
+    def _drop_connection(self, scheme, netloc):
+        conn = self._pool.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def _send(self, method, scheme, netloc, path, data, headers):
+        def send():
+            conn = self._connection(scheme, netloc)
+            proxy_headers = getattr(conn, "proxy_headers", None)
+            if proxy_headers is None:
+                conn.request(method, path, body=data, headers=headers)
+            else:
+                all_headers = dict(headers)
+                all_headers.update(proxy_headers)
+                url = "%s://%s%s" % (scheme, netloc, path)
+                conn.request(method, url, body=data, headers=all_headers)
+            return conn
+
+        # A connection closed by the server while idle, or left unusable by an
+        # earlier failure, is replaced and the request sent again once. Once a
+        # POST has been sent, the server may have acted on it, so failures to
+        # get its response are left to robust() rather than resent here.
+        try:
+            try:
+                conn = send()
+            except (HTTPException, socket.error):
+                self._drop_connection(scheme, netloc)
+                conn = send()
+            try:
+                return conn.getresponse()
+            except (HTTPException, socket.error):
+                if method == "POST":
+                    raise
+                self._drop_connection(scheme, netloc)
+                return send().getresponse()
+        except socket.error as e:
+            self._drop_connection(scheme, netloc)
+            raise URLError(e)
+        except HTTPException:
+            self._drop_connection(scheme, netloc)
+            raise
+
+    def _send_http2(self, method, scheme, netloc, path, data, headers):
+        url = "%s://%s%s" % (scheme, netloc, path)
+        try:
+            return _HTTPXResponse(
+                self._http2.request(method, url, content=data, headers=headers)
+            )
+        except httpx.RequestError as e:  # for robust() to retry
+            raise URLError(e)
+
+    def _request(self, method, scheme, netloc, path, data, headers):
+        """Send a request, over HTTP/2 if available or else on a pooled
+        connection.
+
+        Returns the (scheme, netloc, path) the response came from, and the
+        response. Redirects 301 and 302 are followed, re-posting the data (see
+        Ignore303), while 303 is returned as is.
+        """
+        send = self._send if self._http2 is None else self._send_http2
+        for _ in range(10):
+            res = send(method, scheme, netloc, path, data, headers)
+
+            location = res.getheader("Location")
+            if res.status not in (301, 302) or not location:
+                return (scheme, netloc, path), res
+
+            res.read()
+            res.close()
+            scheme, netloc, path = _split_url(
+                urljoin("%s://%s%s" % (scheme, netloc, path), location)
+            )
 
-    @robust
-    def call(self, url, payload=None, method="GET"):
-        # Ensure full url
-        url = urljoin(self.url, url)
+        raise URLError("Too many redirects calling %s://%s%s" % (scheme, netloc, path))
 
-        if self.verbose:
-            self.log("Calling method %s on %s" % (method, url))
+    def _prepare(self, url, payload, method):
+        """Return the (scheme, netloc, path), body and headers of a call.
 
-        headers = {
-            "Accept": "application/json",
-            "From": self.email,
-            "X-ECMWF-KEY": self.key,
-        }
+        Besides strings, url can be a (scheme, netloc, path) tuple, as kept in
+        self._location, which needs no parsing at all.
+        """
+        # Ensure full url
+        if isinstance(url, tuple):
+            scheme, netloc, path = url
+        else:
+            scheme, netloc, path = _split_url(urljoin(self.url, url))
 
-        opener = build_opener(Ignore303)
+        if self.verbose:
+            self.log("Calling method %s on %s://%s%s" % (method, scheme, netloc, path))
 
+        headers = self._headers_get
         data = None
         if payload is not None:
-            data = json.dumps(payload).encode("utf-8")
-            headers["Content-Type"] = "application/json"
+            data = _dumps(payload)
+            headers = self._headers_post
 
-        url = "%s?offset=%d&limit=500" % (url, self.offset)
-        req = Request(url=url, data=data, headers=headers)
-        if method:
-            req.get_method = lambda: method
+        path = "%s%soffset=%d&limit=500" % (
+            path,
+            "&" if "?" in path else "?",
+            self.offset,
+        )
+        return (scheme, netloc, path), data, headers
+
+    def _process(self, where, code, reason, headers, body):
+        """Update the state of the connection from the response to a call,
+        and return its decoded body.
+
+        where is the (scheme, netloc, path) the response came from. The body
+        is not used for 204, and so need not be read.
+        """
+        # Attributes used repeatedly are bound to locals, as this runs for
+        # every poll; offset, status and last are written back below
+        log = self.log
+        verbose = self.verbose
+        offset = self.offset
+        status = self.status
 
         error = False
-        try:
-            try:
-                res = opener.open(req)
-            except HTTPError as e:
-                # It seems that some version of urllib2 are buggy
-                if e.code <= 299:
-                    res = e
-                else:
-                    raise
-        except HTTPError as e:
-            if self.verbose:
-                self.log(e)
+        self.code = code
+        self._limiter.update(code, headers)
+        if code >= 300 and code not in (303,):
+            if verbose:
+                log("HTTP Error %d: %s" % (code, reason))
             error = True
-            res = e
             # 429: Too many requests
             # 502: Proxy Error
             # 503: Service Temporarily Unavailable
-            if e.code == 429 or e.code >= 500:
-                raise RetryError(e.code, e.read())
+            if code == 429 or code >= 500:
+                raise RetryError(code, body, headers)
 
-        self.retry = int(res.headers.get("Retry-After", self.retry))
-        code = res.code
+        self.retry = int(headers.get("Retry-After", self.retry))
         if code in [201, 202]:
-            self.location = urljoin(url, res.headers.get("Location", self.location))
-
-        if self.verbose:
-            self.log("Response code: %s" % code)
-            self.log("Response Content-Type: %s" % res.headers.get("Content-Type"))
-            self.log("Response Content-Length: %s" % res.headers.get("Content-Length"))
-            self.log("Response Location: %s" % res.headers.get("Location"))
-
-        body = res.read().decode("utf-8")
-        res.close()
+            location = headers.get("Location")
+            if location and location != self._location_header:
+                self.location = urljoin("%s://%s%s" % where, location)
+                self._location = _split_url(self.location)
+                self._location_header = location
+
+        if verbose:
+            log("Response code: %s" % code)
+            log("Response Content-Type: %s" % headers.get("Content-Type"))
+            log("Response Content-Length: %s" % headers.get("Content-Length"))
+            log("Response Location: %s" % headers.get("Location"))
 
         if code in [204]:
             self.last = None
             return None
         else:
+            # The JSON parser takes bytes, so the body is only decoded for
+            # error messages
             try:
-                self.last = json.loads(body)
+                last = _loads(body)
             except Exception as e:
-                self.last = {"error": "%s: %s" % (e, body)}
+                last = {"error": "%s: %s" % (e, body.decode("utf-8", "replace"))}
                 error = True
+            self.last = last
 
-        if self.verbose:
-            self.log("Response content: %s" % json.dumps(self.last, indent=4))
+        if verbose:
+            log("Response content: %s" % _dumps_pretty(last))
 
-        self.status = self.last.get("status", self.status)
+        if last.get("status", status) != status:
+            status = last["status"]
+            self._poll_interval = 1.0
 
-        if self.verbose:
-            self.log("Status %s" % self.status)
+        if verbose:
+            log("Status %s" % status)
+
+        if "messages" in last:
+            quiet = self.quiet
+            for n in last["messages"]:
+                if not quiet:
+                    log(n)
+                offset += 1
 
-        if "messages" in self.last:
-            for n in self.last["messages"]:
-                if not self.quiet:
-                    self.log(n)
-                self.offset += 1
+        self.offset = offset
+        self.status = status
 
-        if code == 200 and self.status == "complete":
-            self.value = self.last
+        if code == 200 and status == "complete":
+            self.value = last
             self.done = True
-            if isinstance(self.value, dict) and "result" in self.value:
-                self.value = self.value["result"]
+            if isinstance(last, dict) and "result" in last:
+                self.value = last["result"]
 
         if code in [303]:
-            self.value = self.last
+            self.value = last
             self.done = True
 
-        if "error" in self.last:
-            raise APIException("ecmwf.API error 1: %s" % (self.last["error"],))
+        if "error" in last:
+            raise APIException("ecmwf.API error 1: %s" % (last["error"],))
 
         if error:
-            raise APIException("ecmwf.API error 2: %s" % (res,))
+            raise APIException("ecmwf.API error 2: HTTP Error %d: %s" % (code, reason))
 
-        return self.last
+        return last
+
+    @robust
+    def call(self, url, payload=None, method="GET"):
+        (scheme, netloc, path), data, headers = self._prepare(url, payload, method)
+        self._limiter.acquire()
+        where, res = self._request(method, scheme, netloc, path, data, headers)
+        with closing(res):
+            # 204 has no body to read
+            body = res.read() if res.status != 204 else None
+        return self._process(where, res.status, res.reason, res.msg, body)
 
     def submit(self, url, payload):
         self.call(url, payload, "POST")
@@ -400,10 +889,14 @@ class Connection(object):
         return self.call(url, None, "GET")
 
     def wait(self):
+        # Poll often at first and whenever the status changes, backing off
+        # towards the Retry-After interval of the server otherwise
+        delay = min(self._poll_interval, self.retry)
         if self.verbose:
-            self.log("Sleeping %s second(s)" % (self.retry))
-        time.sleep(self.retry)
-        self.call(self.location, None, "GET")
+            self.log("Sleeping %s second(s)" % (delay,))
+        time.sleep(delay)
+        self._poll_interval = min(float(self.retry), self._poll_interval * 1.5)
+        self.call(self._location, None, "GET")
 
     def ready(self):
         return self.done
@@ -413,12 +906,110 @@ class Connection(object):
 
     def cleanup(self):
         try:
-            if self.location:
-                self.call(self.location, None, "DELETE")
+            if self._location:
+                self.call(self._location, None, "DELETE")
         except:
             pass
 
 
+# Downloads of at least that size are split into byte ranges fetched in
+# parallel, to get past the throughput of a single TCP stream
+PARALLEL_TRANSFER_THRESHOLD = 64 * 1024 * 1024
+PARALLEL_TRANSFER_MAX_STREAMS = 8
+
+_BYTE_PREFIXES = ("", "K", "M", "G", "T", "P", "E")
+
+# Shared by all requests rather than built by each textwrap.wrap() call
+_WRAPPER = textwrap.TextWrapper(width=70)
+
+
+def download_rcvbuf_size():
+    # Receive buffer requested for download sockets, 0 to keep the default. A
+    # buffer smaller than the bandwidth-delay product of the link caps the
+    # throughput of a TCP stream, but setting one disables the receive buffer
+    # autotuning of Linux, and the size granted is capped by
+    # net.core.rmem_max.
+    try:
+        return int(os.getenv("ECMWF_API_RCVBUF_SIZE", 0))
+    except ValueError:
+        return 0
+
+
+def _write_all(f, buf):
+    # Unbuffered files may write only part of what they are given. Python 2
+    # files write everything and return None.
+    while buf:
+        n = f.write(buf)
+        if n is None:
+            break
+        buf = buf[n:]
+
+
+def _pwrite_all(fd, buf, offset):
+    while buf:
+        n = os.pwrite(fd, buf, offset)
+        buf = buf[n:]
+        offset += n
+
+
+def _split_ranges(size, n):
+    """Split size bytes into at most n inclusive (first, last) byte ranges."""
+    chunk = -(-size // n)
+    return [(first, min(first + chunk, size) - 1) for first in range(0, size, chunk)]
+
+
+def _resumed(code, headers, offset):
+    """Whether a response to a Range request starts at offset."""
+    if code != 206:
+        return False
+    match = re.match(r"bytes (\d+)-", headers.get("Content-Range", ""))
+    return match is not None and int(match.group(1)) == offset
+
+
+def _tune_download_socket(res):
+    size = download_rcvbuf_size()
+    if size <= 0:
+        return
+    try:
+        sock = res.fp.raw._sock
+        # Never shrink the buffer below what the system picked
+        if sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < size:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    except (AttributeError, socket.error):
+        # Not an http.client response, or a platform not supporting it
+        pass
+
+
+def bootstrap_cache_ttl():
+    # Seconds during which the server's introduction (who-am-i, info, news) is
+    # reused from the cache, 0 to disable it
+    try:
+        return float(os.getenv("ECMWF_API_BOOTSTRAP_TTL", 3600))
+    except ValueError:
+        return 3600
+
+
+def _bootstrap_cache_key(url, service, email, key):
+    return hashlib.sha256(
+        ("%s|%s|%s|%s" % (url, service, email, key)).encode("utf-8")
+    ).hexdigest()
+
+
+def _target_key(target):
+    path = os.path.abspath(target)
+    return "target-%s" % (hashlib.sha256(path.encode("utf-8")).hexdigest(),)
+
+
+def _target_record(target, request, size):
+    """What identifies target as the complete result of request: a digest of
+    the request, and the size and time of modification of the file.
+    """
+    digest = hashlib.sha256(
+        json.dumps(request, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return {"request": digest, "size": size, "mtime": os.path.getmtime(target)}
+
+
 class APIRequest(object):
     def __init__(
         self,
@@ -441,143 +1032,289 @@ class APIRequest(object):
             url, email=email, key=key, quiet=quiet, verbose=verbose, log=log
         )
 
+        # The server's introduction rarely changes, so it is cached for a
+        # while rather than fetched before every request
+        self._cache_key = _bootstrap_cache_key(url, service, email, key)
+
         self.log("ECMWF API python library %s" % (VERSION,))
         self.log("ECMWF API at %s" % (self.url,))
 
-        user = self.connection.call("%s/%s" % (self.url, "who-am-i"))
+        user = self._cached_call("who-am-i", "%s/%s" % (self.url, "who-am-i"))
+        self._welcome(user)
 
-        if os.getenv("GITHUB_ACTION") is None:
-            self.log("Welcome %s" % (user["full_name"] or "user '%s'" % user["uid"],))
-
-        general_info = self.connection.call("%s/%s" % (self.url, "info")).get("info")
+        general_info = self._cached_call("info", "%s/%s" % (self.url, "info")).get(
+            "info"
+        )
         self.show_info(general_info, user["uid"])
 
-        service_specific_info = self.connection.call(
-            "%s/%s/%s" % (self.url, self.service, "info")
+        service_specific_info = self._cached_call(
+            "service-info", "%s/%s/%s" % (self.url, self.service, "info")
         ).get("info")
         self.show_info(service_specific_info, user["uid"])
 
         if news:
             try:
-                news = self.connection.call(
-                    "%s/%s/%s" % (self.url, self.service, "news")
+                news = self._cached_call(
+                    "news", "%s/%s/%s" % (self.url, self.service, "news")
                 )
-                for n in news["news"].split("\n"):
-                    self.log(n)
+                self.log(news["news"])
             except:
                 pass
 
+    def _welcome(self, user):
+        if os.getenv("GITHUB_ACTION") is None:
+            self.log("Welcome %s" % (user["full_name"] or "user '%s'" % user["uid"],))
+
+    def _cached_call(self, name, url):
+        value = self._cache_get(name)
+        if value is None:
+            value = self.connection.call(url)
+            self._cache_put(name, value)
+        return value
+
+    def _cache_get(self, name):
+        return _cache.get("%s-%s" % (self._cache_key, name), bootstrap_cache_ttl())
+
+    def _cache_put(self, name, value):
+        _cache.put("%s-%s" % (self._cache_key, name), value)
+
+    def _clear_cache(self):
+        for name in ("who-am-i", "info", "service-info", "news"):
+            _cache.delete("%s-%s" % (self._cache_key, name))
+
     def _bytename(self, size):
-        prefix = {"": "K", "K": "M", "M": "G", "G": "T", "T": "P", "P": "E"}
-        l = ""
-        size = size * 1.0
-        while 1024 < size:
-            l = prefix[l]
-            size = size / 1024
+        # One more unit prefix for every 10 bits the size needs beyond the
+        # first 10, so that a size of up to 1024 units keeps the smaller unit
+        i = (int(math.ceil(size) - 1).bit_length() - 1) // 10
+        i = min(max(0, i), len(_BYTE_PREFIXES) - 1)
+        size = size / float(1 << (i * 10))
         s = ""
         if size > 1:
             s = "s"
-        return "%g %sbyte%s" % (size, l, s)
-
-    @robust
-    def _transfer(self, url, path, size):
-        start = time.time()
-        existing_size = 0
-        req = Request(url)
-
-        if os.path.exists(path):
-            mode = "ab"
-            existing_size = os.path.getsize(path)
-            req.add_header("Range", "bytes=%s-" % existing_size)
-        else:
-            mode = "wb"
-
+        return "%g %sbyte%s" % (size, _BYTE_PREFIXES[i], s)
+
+    def _parallel_transfer(self, url, path, size):
+        """Download url into path as several byte ranges, fetched in parallel
+        and each written at its offset in the file.
+        """
+        n = int(min(PARALLEL_TRANSFER_MAX_STREAMS, size // (16 << 20)))
+        ranges = _split_ranges(size, n)
+
+        self.log("Using %d parallel streams" % (n,))
+
+        def fetch(byte_range):
+            first, last = byte_range
+            req = Request(url, headers={"Range": "bytes=%d-%d" % byte_range})
+            with closing(_OPENER.open(req)) as http:
+                _tune_download_socket(http)
+                if http.getcode() != 206:
+                    raise IOError("range requests not supported by the server")
+                offset = first
+                buf = memoryview(bytearray(1048576))
+                while offset <= last:
+                    n = http.readinto(buf)
+                    if not n:
+                        break
+                    _pwrite_all(fd, buf[:n], offset)
+                    offset += n
+            if offset != last + 1:
+                raise IOError("incomplete range %d-%d" % byte_range)
+            return offset - first
+
+        # Written beside path and renamed once every range is complete, as the
+        # preallocated file would otherwise pass for a complete download
+        part = path + ".part"
+        fd = os.open(part, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            os.ftruncate(fd, size)
+            with ThreadPoolExecutor(max_workers=n) as executor:
+                transferred = sum(executor.map(fetch, ranges))
+        except BaseException:
+            os.close(fd)
+            os.remove(part)
+            raise
+        os.close(fd)
+        os.replace(part, path)
+        return transferred
+
+    def _transfer_start(self, url, path, size):
+        """Log the start of the transfer of url into path, and return the
+        number of bytes of it already in path, to resume from.
+        """
+        existing_size = os.path.getsize(path) if os.path.exists(path) else 0
         self.log(
             "Transfering %s into %s" % (self._bytename(size - existing_size), path)
         )
         self.log("From %s" % (url,))
+        return existing_size
 
-        bytes_transferred = 0
-        with open(path, mode) as f:
-            with closing(urlopen(req)) as http:
-                while True:
-                    chunk = http.read(1048576)  # 1MB chunks
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    bytes_transferred += len(chunk)
-
+    def _transfer_end(self, start, existing_size, bytes_transferred, size):
         end = time.time()
 
         if end > start:
             transfer_rate = bytes_transferred / (end - start)
             self.log("Transfer rate %s/s" % self._bytename(transfer_rate))
 
-        return existing_size + bytes_transferred
+        if existing_size + bytes_transferred != size:
+            raise ResumeFailedError(existing_size + bytes_transferred, size)
+
+        return size
+
+    @robust
+    def _transfer(self, url, path, size):
+        start = time.time()
+        existing_size = self._transfer_start(url, path, size)
+        req = Request(url)
+
+        if existing_size:
+            mode = "ab"
+            req.add_header("Range", "bytes=%s-" % existing_size)
+        else:
+            mode = "wb"
 
-    def execute(self, request, target=None):
+        bytes_transferred = 0
+        if (
+            existing_size == 0
+            and size >= PARALLEL_TRANSFER_THRESHOLD
+            and ThreadPoolExecutor is not None
+            and hasattr(os, "pwrite")
+        ):
+            try:
+                bytes_transferred = self._parallel_transfer(url, path, size)
+            except Exception as e:
+                self.log("Parallel transfer failed (%s), using a single stream" % (e,))
+                mode = "wb"
+                req = Request(url)
+
+        if not bytes_transferred:
+            http = _OPENER.open(req)
+            if existing_size and not _resumed(
+                http.getcode(), http.headers, existing_size
+            ):
+                # Appending would corrupt the file, start again instead
+                http.close()
+                self.log("Transfer cannot be resumed, restarting it")
+                existing_size = 0
+                mode = "wb"
+                http = _OPENER.open(Request(url))
+
+            # Unbuffered, as data is written in large blocks anyway
+            with open(path, mode, buffering=0) as f:
+                with closing(http):
+                    _tune_download_socket(http)
+                    if hasattr(http, "readinto"):
+                        # Read into the same buffer over and over, rather than
+                        # allocating a new 1MB bytes object for every chunk
+                        buf = memoryview(bytearray(1048576))
+                        while True:
+                            n = http.readinto(buf)
+                            if not n:
+                                break
+                            _write_all(f, buf[:n])
+                            bytes_transferred += n
+                    else:
+                        while True:
+                            chunk = http.read(1048576)  # 1MB chunks
+                            if not chunk:
+                                break
+                            _write_all(f, memoryview(chunk))
+                            bytes_transferred += len(chunk)
+
+        return self._transfer_end(start, existing_size, bytes_transferred, size)
+
+    def execute(self, request, target=None, force=False):
         status = None
 
-        self.connection.submit("%s/%s/requests" % (self.url, self.service), request)
+        try:
+            self.connection.submit(
+                "%s/%s/requests" % (self.url, self.service), request
+            )
+        except APIException:
+            # The cached introduction may hide that the key is no longer valid
+            if self.connection.code in (401, 403):
+                self._clear_cache()
+            raise
         self.log("Request submitted")
         self.log("Request id: " + self.connection.last.get("name"))
-        if self.connection.status != status:
-            status = self.connection.status
-            self.log("Request is %s" % (status,))
+        status = self._log_status(status)
 
         while not self.connection.ready():
-            if self.connection.status != status:
-                status = self.connection.status
-                self.log("Request is %s" % (status,))
+            status = self._log_status(status)
             self.connection.wait()
 
-        if self.connection.status != status:
-            status = self.connection.status
-            self.log("Request is %s" % (status,))
+        status = self._log_status(status)
 
         result = self.connection.result()
         if target:
-            if os.path.exists(target):
-                # Empty the target file, if it already exists, otherwise the
-                # transfer below might be fooled into thinking we're resuming
-                # an interrupted download.
-                open(target, "w").close()
+            if self._target_complete(target, request, result["size"], force):
+                self.connection.cleanup()
+                return result
 
-            size = -1
             tries = 0
-            while size != result["size"] and tries < 10:
-                size = self._transfer(
-                    urljoin(self.url, result["href"]), target, result["size"]
-                )
-                if size != result["size"] and tries < 10:
+            while True:
+                try:
+                    self._transfer(
+                        urljoin(self.url, result["href"]), target, result["size"]
+                    )
+                    break
+                except ResumeFailedError as e:
+                    # More data than expected will not be fixed by resuming
+                    if e.size > e.expected or tries >= 10:
+                        raise
                     tries += 1
                     self.log("Transfer interrupted, resuming in 60s...")
                     time.sleep(60)
-                else:
-                    break
 
-            assert size == result["size"]
+            self._target_done(target, request, result["size"])
 
         self.connection.cleanup()
 
         return result
 
+    def _log_status(self, status):
+        """Log the status of the request if it is no longer status, and
+        return it.
+        """
+        if self.connection.status != status:
+            status = self.connection.status
+            self.log("Request is %s" % (status,))
+        return status
+
+    def _target_complete(self, target, request, size, force):
+        """Whether target already holds the result of request, as downloaded
+        by an earlier run of the same request and not modified since.
+        Otherwise, target is emptied.
+        """
+        if not os.path.exists(target):
+            return False
+        if not force and _cache.get(_target_key(target), float("inf")) == (
+            _target_record(target, request, size)
+        ):
+            self.log("Target %s already complete, skipping transfer" % (target,))
+            return True
+        # Empty the target file, if it already exists, otherwise the transfer
+        # might be fooled into thinking we're resuming an interrupted download.
+        open(target, "w").close()
+        return False
+
+    def _target_done(self, target, request, size):
+        # Recorded for _target_complete() to recognise target in later runs
+        _cache.put(_target_key(target), _target_record(target, request, size))
+
     def show_info(self, info, uid):
-        n = 0
+        # Logged as a single multi-line message
+        lines = []
         if "message" in info:
-            self.log("")
-            n += 1
-            for m in textwrap.wrap(info["message"]):
-                self.log(m)
+            lines.append("")
+            lines.extend(_WRAPPER.wrap(info["message"]))
 
         if uid in info.get("user_messages", {}):
-            self.log("")
-            n += 1
-            for m in textwrap.wrap(info["user_messages"][uid]):
-                self.log(m)
+            lines.append("")
+            lines.extend(_WRAPPER.wrap(info["user_messages"][uid]))
 
-        if n:
-            self.log("")
+        if lines:
+            lines.append("")
+            self.log("\n".join(lines))
 
 
 class ECMWFDataServer(object):
@@ -593,7 +1330,7 @@ class ECMWFDataServer(object):
         self.verbose = verbose
         self.log = log
 
-    def retrieve(self, req):
+    def retrieve(self, req, force=False):
         target = req.get("target")
         dataset = req.get("dataset")
         c = APIRequest(
@@ -604,7 +1341,22 @@ class ECMWFDataServer(object):
             log=self.log,
             verbose=self.verbose,
         )
-        c.execute(req, target)
+        c.execute(req, target, force)
+
+    def retrieve_many(self, reqs):
+        """Retrieve several requests concurrently rather than one after the
+        other, and return their results. The exception raised by a failed
+        request is returned in place of its result. Requires aiohttp.
+        """
+        import asyncio
+
+        from ecmwfapi import async_api
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(async_api.retrieve_many(self, reqs))
+        finally:
+            loop.close()
 
 
 class ECMWFService(object):
@@ -629,7 +1381,7 @@ class ECMWFService(object):
         self.quiet = quiet
         self.log = log
 
-    def execute(self, req, target):
+    def execute(self, req, target, force=False):
         c = APIRequest(
             self.url,
             "services/%s" % (self.service,),
@@ -639,5 +1391,5 @@ class ECMWFService(object):
             verbose=self.verbose,
             quiet=self.quiet,
         )
-        c.execute(req, target)
+        c.execute(req, target, force)
         self.log("Done")
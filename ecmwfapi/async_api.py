@@ -0,0 +1,339 @@
+#
+# (C) Copyright 2012-2013 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""Asynchronous versions of Connection and APIRequest, used to run several
+requests concurrently on one event loop. Requires aiohttp.
+"""
+
+import asyncio
+import sys
+import time
+import traceback
+from urllib.parse import urljoin
+
+import aiohttp
+
+from ecmwfapi.api import (
+    VERSION,
+    APIException,
+    APIRequest,
+    Connection,
+    ResumeFailedError,
+    RetryError,
+    _SSL_CONTEXT,
+    _bootstrap_cache_key,
+    _resumed,
+    _split_url,
+    max_retries,
+    no_log,
+    retry_delay,
+)
+
+
+def robust(func):
+    async def wrapped(self, *args, **kwargs):
+        max_tries = tries = max_retries()
+        last_error = None
+        while tries > 0:
+            try:
+                return await func(self, *args, **kwargs)
+            except aiohttp.ClientResponseError as e:
+                if self.verbose:
+                    self.log("WARNING: HTTPError received %s" % e)
+                if e.status < 500 or e.status in (501,):  # 501: not implemented
+                    raise
+                last_error = e
+            except aiohttp.ClientError as e:
+                if self.verbose:
+                    self.log("WARNING: ClientError received %s" % e)
+                last_error = e
+            except asyncio.TimeoutError as e:
+                if self.verbose:
+                    self.log("WARNING: Timeout %s" % e)
+                last_error = e
+            except APIException:
+                raise
+            except RetryError as e:
+                if self.verbose:
+                    self.log("WARNING: HTTP received %s" % e.code)
+                    self.log(e.text)
+                last_error = e
+            except:
+                if self.verbose:
+                    self.log("Unexpected error: %s" % sys.exc_info()[0])
+                    self.log(traceback.format_exc())
+                raise
+            delay = retry_delay(max_tries - tries, last_error)
+            self.log(
+                "Error contacting the WebAPI, retrying in %.1f seconds ..." % delay
+            )
+            await asyncio.sleep(delay)
+            tries -= 1
+        # if all retries have been exhausted, raise the last exception caught
+        self.log("Could not contact the WebAPI after %d tries, failing !" % max_tries)
+        raise last_error
+
+    return wrapped
+
+
+async def _acquire(limiter):
+    # _RateLimiter.acquire(), sleeping without blocking the event loop
+    while True:
+        delay = limiter.reserve()
+        if delay <= 0:
+            return
+        await asyncio.sleep(delay)
+
+
+class AsyncConnection(Connection):
+    """Connection whose calls are coroutines, sent with an aiohttp session.
+    Requests are prepared, and responses processed, by Connection.
+    """
+
+    def __init__(
+        self,
+        session,
+        url,
+        email=None,
+        key=None,
+        verbose=False,
+        quiet=False,
+        log=no_log,
+    ):
+        super(AsyncConnection, self).__init__(
+            url, email=email, key=key, verbose=verbose, quiet=quiet, log=log
+        )
+        self.session = session
+
+    async def _request(self, method, scheme, netloc, path, data, headers):
+        # Follow 301 and 302 by hand, re-posting the data, and return 303 as
+        # is, like Connection._request()
+        url = "%s://%s%s" % (scheme, netloc, path)
+        for _ in range(10):
+            res = await self.session.request(
+                method, url, data=data, headers=headers, allow_redirects=False
+            )
+            location = res.headers.get("Location")
+            if res.status not in (301, 302) or not location:
+                return _split_url(url), res
+            res.release()
+            url = urljoin(url, location)
+
+        raise aiohttp.ClientError("Too many redirects calling %s" % (url,))
+
+    @robust
+    async def call(self, url, payload=None, method="GET"):
+        (scheme, netloc, path), data, headers = self._prepare(url, payload, method)
+        await _acquire(self._limiter)
+        where, res = await self._request(method, scheme, netloc, path, data, headers)
+        async with res:
+            body = await res.read()
+        return self._process(where, res.status, res.reason, res.headers, body)
+
+    async def submit(self, url, payload):
+        await self.call(url, payload, "POST")
+
+    async def wait(self):
+        # Poll often at first and whenever the status changes, backing off
+        # towards the Retry-After interval of the server otherwise
+        delay = min(self._poll_interval, self.retry)
+        if self.verbose:
+            self.log("Sleeping %s second(s)" % (delay,))
+        await asyncio.sleep(delay)
+        self._poll_interval = min(float(self.retry), self._poll_interval * 1.5)
+        await self.call(self._location, None, "GET")
+
+    async def cleanup(self):
+        try:
+            if self._location:
+                await self.call(self._location, None, "DELETE")
+        except:
+            pass
+
+
+class AsyncAPIRequest(APIRequest):
+    """APIRequest whose steps are coroutines. Unlike APIRequest, it does not
+    introduce the server on creation: bootstrap() must be awaited first.
+    """
+
+    def __init__(
+        self,
+        session,
+        url,
+        service,
+        email=None,
+        key=None,
+        log=no_log,
+        quiet=False,
+        verbose=False,
+    ):
+        self.session = session
+        self.url = url
+        self.service = service
+        self.log = log
+        self.quiet = quiet
+        self.verbose = verbose
+
+        self.connection = AsyncConnection(
+            session, url, email=email, key=key, quiet=quiet, verbose=verbose, log=log
+        )
+
+        self._cache_key = _bootstrap_cache_key(url, service, email, key)
+
+    async def bootstrap(self, news=True):
+        self.log("ECMWF API python library %s" % (VERSION,))
+        self.log("ECMWF API at %s" % (self.url,))
+
+        user = await self._cached_call("who-am-i", "%s/%s" % (self.url, "who-am-i"))
+        self._welcome(user)
+
+        general_info = await self._cached_call("info", "%s/%s" % (self.url, "info"))
+        self.show_info(general_info.get("info"), user["uid"])
+
+        service_specific_info = await self._cached_call(
+            "service-info", "%s/%s/%s" % (self.url, self.service, "info")
+        )
+        self.show_info(service_specific_info.get("info"), user["uid"])
+
+        if news:
+            try:
+                news = await self._cached_call(
+                    "news", "%s/%s/%s" % (self.url, self.service, "news")
+                )
+                self.log(news["news"])
+            except Exception:
+                pass
+
+    async def _cached_call(self, name, url):
+        value = self._cache_get(name)
+        if value is None:
+            value = await self.connection.call(url)
+            self._cache_put(name, value)
+        return value
+
+    @robust
+    async def _transfer(self, url, path, size):
+        start = time.time()
+        existing_size = self._transfer_start(url, path, size)
+        headers = {}
+
+        if existing_size:
+            mode = "ab"
+            headers["Range"] = "bytes=%s-" % existing_size
+        else:
+            mode = "wb"
+
+        bytes_transferred = 0
+        res = await self.session.get(url, headers=headers)
+        if existing_size and not _resumed(res.status, res.headers, existing_size):
+            # Appending would corrupt the file, start again instead
+            res.release()
+            self.log("Transfer cannot be resumed, restarting it")
+            existing_size = 0
+            mode = "wb"
+            res = await self.session.get(url)
+
+        # aiohttp has no readinto(), so chunks are written as they come. The
+        # writes run in the default executor, not to block the event loop.
+        loop = asyncio.get_event_loop()
+        async with res:
+            res.raise_for_status()
+            with open(path, mode) as f:
+                async for chunk in res.content.iter_chunked(1048576):
+                    await loop.run_in_executor(None, f.write, chunk)
+                    bytes_transferred += len(chunk)
+
+        return self._transfer_end(start, existing_size, bytes_transferred, size)
+
+    async def execute(self, request, target=None, force=False):
+        status = None
+
+        try:
+            await self.connection.submit(
+                "%s/%s/requests" % (self.url, self.service), request
+            )
+        except APIException:
+            # The cached introduction may hide that the key is no longer valid
+            if self.connection.code in (401, 403):
+                self._clear_cache()
+            raise
+        self.log("Request submitted")
+        self.log("Request id: " + self.connection.last.get("name"))
+        status = self._log_status(status)
+
+        while not self.connection.ready():
+            status = self._log_status(status)
+            await self.connection.wait()
+
+        status = self._log_status(status)
+
+        result = self.connection.result()
+        if target:
+            if self._target_complete(target, request, result["size"], force):
+                await self.connection.cleanup()
+                return result
+
+            tries = 0
+            while True:
+                try:
+                    await self._transfer(
+                        urljoin(self.url, result["href"]), target, result["size"]
+                    )
+                    break
+                except ResumeFailedError as e:
+                    # More data than expected will not be fixed by resuming
+                    if e.size > e.expected or tries >= 10:
+                        raise
+                    tries += 1
+                    self.log("Transfer interrupted, resuming in 60s...")
+                    await asyncio.sleep(60)
+
+            self._target_done(target, request, result["size"])
+
+        await self.connection.cleanup()
+
+        return result
+
+
+async def retrieve_many(server, reqs):
+    """Retrieve the requests of a list concurrently, using one HTTP session
+    for all of them, and return their results in the same order.
+
+    A failed request does not stop the others: its exception is returned in
+    place of its result. If retrieve_many is cancelled, the requests still
+    running are deleted from the server before the cancellation propagates.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=100, keepalive_timeout=300, ssl=_SSL_CONTEXT
+    )
+    # aiohttp limits the total time of a call to 5 minutes by default, too
+    # short to download large results: only the time to connect is limited
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+        async def retrieve(req):
+            c = AsyncAPIRequest(
+                session,
+                server.url,
+                "datasets/%s" % (req.get("dataset"),),
+                email=server.email,
+                key=server.key,
+                log=server.log,
+                verbose=server.verbose,
+            )
+            try:
+                await c.bootstrap()
+                return await c.execute(req, req.get("target"))
+            except asyncio.CancelledError:
+                await c.connection.cleanup()
+                raise
+
+        return await asyncio.gather(
+            *[retrieve(req) for req in reqs], return_exceptions=True
+        )
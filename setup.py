@@ -34,6 +34,11 @@ setup(
     long_description_content_type="text/markdown",
     packages=find_packages(),
     zip_safe=True,
+    extras_require={
+        "async": ["aiohttp"],
+        "http2": ["httpx[http2]"],
+        "orjson": ["orjson"],
+    },
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
@@ -0,0 +1,178 @@
+import json
+import os
+import re
+import threading
+
+import pytest
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+from ecmwfapi import _cache
+from ecmwfapi.api import APIRequest, no_log
+
+
+class DataHandler(BaseHTTPRequestHandler):
+    """Serve data at /data, honouring Range headers, and at /norange,
+    ignoring them.
+    """
+
+    protocol_version = "HTTP/1.1"
+    data = b""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path not in ("/data", "/norange"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        first, last = 0, len(self.data) - 1
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        ranged = match is not None and self.path == "/data"
+        if ranged:
+            first = int(match.group(1))
+            if match.group(2):
+                last = int(match.group(2))
+
+        self.send_response(206 if ranged else 200)
+        self.send_header("Content-Length", str(last + 1 - first))
+        if ranged:
+            self.send_header(
+                "Content-Range", "bytes %d-%d/%d" % (first, last, len(self.data))
+            )
+        self.end_headers()
+        try:
+            self.wfile.write(self.data[first : last + 1])
+        except (IOError, OSError):
+            # The client may close a response it did not want
+            pass
+
+
+class APIHandler(DataHandler):
+    """A minimal WebAPI, under /v1, completing every request at once with
+    data as its result. Requests for dataset "forbidden" are answered 403.
+    The method and path of every call are appended to calls.
+    """
+
+    calls = None
+
+    def _reply(self, code, value=None, headers=()):
+        body = b"" if value is None else json.dumps(value).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for header in headers:
+            self.send_header(*header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _call(self, method):
+        path = self.path.split("?")[0]
+        self.calls.append((method, path))
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        return path
+
+    def do_GET(self):
+        if not self.path.startswith("/v1/"):
+            return DataHandler.do_GET(self)
+        path = self._call("GET")
+        if path == "/v1/who-am-i":
+            self._reply(200, {"uid": "u", "full_name": "User"})
+        elif path.endswith("/info"):
+            self._reply(200, {"info": {}})
+        elif path.endswith("/news"):
+            self._reply(200, {"news": "News"})
+        elif path.endswith("/requests/1"):
+            result = {"href": "/data", "size": len(self.data)}
+            self._reply(200, {"status": "complete", "result": result})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self._call("POST")
+        if path == "/v1/datasets/forbidden/requests":
+            self._reply(403, {"error": "forbidden"})
+        elif path.endswith("/requests"):
+            headers = [("Location", path + "/1"), ("Retry-After", "0")]
+            self._reply(202, {"status": "queued", "name": "1"}, headers)
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        self._call("DELETE")
+        self._reply(204)
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def serve():
+    """Return a function starting a local server with a request handler
+    class, and returning its URL. The servers stop after the test.
+    """
+    servers = []
+
+    def serve(handler):
+        server = ThreadingServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        servers.append(server)
+        return "http://127.0.0.1:%d" % (server.server_address[1],)
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="session")
+def data():
+    # Large enough to be split into two parallel ranges
+    return os.urandom(32 * 1024 * 1024 + 17)
+
+
+@pytest.fixture
+def data_server(serve, data):
+    """Return the URL of a local server of data."""
+    return serve(type("Handler", (DataHandler,), {"data": data}))
+
+
+@pytest.fixture
+def api_server(serve, data):
+    """Return the URL of a local WebAPI, and the list of calls made to it."""
+    calls = []
+    handler = type("Handler", (APIHandler,), {"data": data, "calls": calls})
+    return serve(handler) + "/v1", calls
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the bootstrap cache of each test in its temporary directory."""
+    path = str(tmp_path / "cache")
+    monkeypatch.setattr(_cache, "CACHE_DIR", path)
+    return path
+
+
+@pytest.fixture
+def api_request(monkeypatch):
+    """Return an APIRequest that has not introduced itself to any server,
+    enough to test transfers.
+    """
+    monkeypatch.setenv("ECMWF_API_MAX_RETRIES", "1")
+    request = APIRequest.__new__(APIRequest)
+    request.log = no_log
+    request.verbose = False
+    return request
@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+from ecmwfapi import api
+
+
+@pytest.fixture(autouse=True)
+def rcfile_cache(monkeypatch):
+    monkeypatch.setattr(api, "_rcfile_cache", {})
+
+
+def write_rcfile(path, key):
+    with open(path, "w") as f:
+        json.dump({"key": key, "url": "https://api.example.int/v1", "email": "e"}, f)
+
+
+def test_rcfile(tmp_path):
+    path = str(tmp_path / "rc")
+    write_rcfile(path, "k1")
+    values = ("k1", "https://api.example.int/v1", "e")
+    assert api.get_apikey_values_from_rcfile(path) == values
+    assert len(api._rcfile_cache) == 1
+
+
+def test_rcfile_cached(tmp_path, monkeypatch):
+    path = str(tmp_path / "rc")
+    write_rcfile(path, "k1")
+    api.get_apikey_values_from_rcfile(path)
+
+    def fail(*args):
+        raise AssertionError("rc file read again")
+
+    monkeypatch.setattr(api.json, "load", fail)
+    assert api.get_apikey_values_from_rcfile(path)[0] == "k1"
+
+
+def test_rcfile_edited(tmp_path):
+    path = str(tmp_path / "rc")
+    write_rcfile(path, "k1")
+    assert api.get_apikey_values_from_rcfile(path)[0] == "k1"
+    write_rcfile(path, "k2")
+    # Same size: the time of modification tells the change
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert api.get_apikey_values_from_rcfile(path)[0] == "k2"
+
+
+def test_rcfile_errors_not_cached(tmp_path):
+    path = str(tmp_path / "rc")
+    with open(path, "w") as f:
+        f.write("{not json")
+    with pytest.raises(api.APIKeyFetchError):
+        api.get_apikey_values_from_rcfile(path)
+    with open(path, "w") as f:
+        json.dump({"key": "k1"}, f)
+    with pytest.raises(api.APIKeyFetchError):
+        api.get_apikey_values_from_rcfile(path)
+    assert api._rcfile_cache == {}
+    with pytest.raises(api.APIKeyNotFoundError):
+        api.get_apikey_values_from_rcfile(str(tmp_path / "missing"))
+    assert api._rcfile_cache == {}
+
+
+def test_rcfile_without_mtime_ns(tmp_path, monkeypatch):
+    # As on Python 2
+    path = str(tmp_path / "rc")
+    write_rcfile(path, "k1")
+    stat = os.stat(path)
+
+    class Stat(object):
+        st_mtime = stat.st_mtime
+        st_size = stat.st_size
+
+    monkeypatch.setattr(api.os, "stat", lambda path: Stat())
+    assert api.get_apikey_values_from_rcfile(path)[0] == "k1"
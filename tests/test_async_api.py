@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from ecmwfapi import async_api
+from ecmwfapi.api import APIException, ECMWFDataServer, no_log
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_retrieve_many(api_server, data, tmp_path):
+    url, calls = api_server
+    server = ECMWFDataServer(url=url, key="k", email="e", log=no_log)
+    targets = [str(tmp_path / "a"), str(tmp_path / "b")]
+    reqs = [
+        {"dataset": "x", "target": targets[0]},
+        {"dataset": "forbidden", "target": str(tmp_path / "c")},
+        {"dataset": "y", "target": targets[1]},
+    ]
+
+    results = server.retrieve_many(reqs)
+
+    assert results[0] == results[2] == {"href": "/data", "size": len(data)}
+    # The failed request does not stop the others
+    assert isinstance(results[1], APIException)
+    for target in targets:
+        with open(target, "rb") as f:
+            assert f.read() == data
+    assert not (tmp_path / "c").exists()
+    # Completed requests are deleted from the server
+    assert ("DELETE", "/v1/datasets/x/requests/1") in calls
+    assert ("DELETE", "/v1/datasets/y/requests/1") in calls
+
+
+def test_bootstrap_cached(api_server):
+    url, calls = api_server
+
+    async def bootstrap():
+        async with aiohttp.ClientSession() as session:
+            request = async_api.AsyncAPIRequest(
+                session, url, "datasets/x", email="e", key="k"
+            )
+            await request.bootstrap()
+
+    run(bootstrap())
+    assert len(calls) == 4
+    # Served from the cache the second time
+    run(bootstrap())
+    assert len(calls) == 4
+
+
+def test_robust_retries_timeouts(monkeypatch):
+    monkeypatch.setenv("ECMWF_API_MAX_RETRIES", "3")
+
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(async_api.asyncio, "sleep", sleep)
+
+    class Slow(object):
+        verbose = False
+        calls = 0
+
+        def log(self, message):
+            pass
+
+        @async_api.robust
+        async def call(self):
+            self.calls += 1
+            if self.calls < 3:
+                raise asyncio.TimeoutError()
+            return "done"
+
+    slow = Slow()
+    assert run(slow.call()) == "done"
+    assert slow.calls == 3
+
+
+def test_robust_does_not_retry_4xx(monkeypatch):
+    monkeypatch.setenv("ECMWF_API_MAX_RETRIES", "3")
+
+    class Missing(object):
+        verbose = False
+        calls = 0
+
+        def log(self, message):
+            pass
+
+        @async_api.robust
+        async def call(self):
+            self.calls += 1
+            raise aiohttp.ClientResponseError(None, (), status=404)
+
+    missing = Missing()
+    with pytest.raises(aiohttp.ClientResponseError):
+        run(missing.call())
+    assert missing.calls == 1
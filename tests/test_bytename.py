@@ -0,0 +1,31 @@
+from ecmwfapi.api import APIRequest
+
+
+def bytename(size):
+    return APIRequest._bytename(None, size)
+
+
+def test_bytename():
+    assert bytename(0) == "0 byte"
+    assert bytename(1) == "1 byte"
+    assert bytename(1023) == "1023 bytes"
+    assert bytename(1536) == "1.5 Kbytes"
+    assert bytename(1024**2 + 1024) == "1.00098 Mbytes"
+    assert bytename(3 * 1024**3) == "3 Gbytes"
+
+
+def test_bytename_keeps_smaller_unit_up_to_1024():
+    assert bytename(1024) == "1024 bytes"
+    assert bytename(1025) == "1.00098 Kbytes"
+    assert bytename(1024**2) == "1024 Kbytes"
+    assert bytename(1024**6) == "1024 Pbytes"
+
+
+def test_bytename_beyond_prefixes():
+    assert bytename(4096 * 1024**6) == "4096 Ebytes"
+
+
+def test_bytename_rate():
+    # Transfer rates are floats
+    assert bytename(1024 * 1024 * 2.5) == "2.5 Mbytes"
+    assert bytename(0.5) == "0.5 byte"
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from ecmwfapi import _cache
+from ecmwfapi.api import APIException, APIRequest, bootstrap_cache_ttl, no_log
+
+
+def test_put_get(cache_dir):
+    _cache.put("key", {"uid": "u"})
+    assert _cache.get("key", 60) == {"uid": "u"}
+    assert _cache.get("other", 60) is None
+
+
+def test_ttl(cache_dir):
+    _cache.put("key", [1, 2])
+    # Make the entry two minutes old
+    old = time.time() - 120
+    os.utime(os.path.join(cache_dir, "key.json"), (old, old))
+    assert _cache.get("key", 60) is None
+    assert _cache.get("key", 180) == [1, 2]
+
+
+def test_ttl_zero_disables(cache_dir):
+    _cache.put("key", 1)
+    assert _cache.get("key", 0) is None
+
+
+def test_delete(cache_dir):
+    _cache.put("key", 1)
+    _cache.delete("key")
+    assert _cache.get("key", 60) is None
+    # Deleting a missing entry is not an error
+    _cache.delete("key")
+
+
+def test_put_is_atomic(cache_dir):
+    _cache.put("key", "old")
+    # A value that cannot be written leaves the previous entry, and no
+    # temporary file, behind
+    _cache.put("key", object())
+    assert _cache.get("key", 60) == "old"
+    assert os.listdir(cache_dir) == ["key.json"]
+
+
+def test_corrupt_entry(cache_dir):
+    _cache.put("key", 1)
+    with open(os.path.join(cache_dir, "key.json"), "w") as f:
+        f.write("{not json")
+    assert _cache.get("key", 60) is None
+
+
+def api_request(url, service="datasets/x"):
+    return APIRequest(url, service, email="e", key="k", log=no_log)
+
+
+def test_bootstrap_cached(api_server):
+    url, calls = api_server
+    api_request(url)
+    assert [path for _, path in calls] == [
+        "/v1/who-am-i",
+        "/v1/info",
+        "/v1/datasets/x/info",
+        "/v1/datasets/x/news",
+    ]
+    del calls[:]
+    api_request(url)
+    assert calls == []
+    # Each service has its own entries
+    api_request(url, "datasets/y")
+    assert len(calls) == 4
+
+
+def test_bootstrap_cache_disabled(api_server, monkeypatch):
+    monkeypatch.setenv("ECMWF_API_BOOTSTRAP_TTL", "0")
+    url, calls = api_server
+    api_request(url)
+    api_request(url)
+    assert len(calls) == 8
+
+
+def test_bootstrap_cache_ttl_setting(monkeypatch):
+    monkeypatch.delenv("ECMWF_API_BOOTSTRAP_TTL", raising=False)
+    assert bootstrap_cache_ttl() == 3600
+    for value, expected in (("60", 60), ("0.5", 0.5), ("0", 0), ("1h", 3600)):
+        monkeypatch.setenv("ECMWF_API_BOOTSTRAP_TTL", value)
+        assert bootstrap_cache_ttl() == expected
+
+
+def test_cache_cleared_on_forbidden(api_server):
+    url, calls = api_server
+    request = api_request(url, "datasets/forbidden")
+    with pytest.raises(APIException):
+        request.execute({})
+    del calls[:]
+    # The key may no longer be valid: introduce it to the server again
+    api_request(url, "datasets/forbidden")
+    assert len(calls) == 4
@@ -0,0 +1,213 @@
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+try:
+    from http.server import BaseHTTPRequestHandler
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+
+from ecmwfapi import api
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answer every request with a JSON object giving its method, path and
+    body. The method, path, headers and client port of every request are
+    appended to requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+    requests = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code, value=None, headers=()):
+        body = json.dumps(value or {}).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for header in headers:
+            self.send_header(*header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        self.requests.append(
+            (method, self.path, dict(self.headers), self.client_address[1])
+        )
+        self.answer(method, self.path.split("?")[0], body)
+
+    def answer(self, method, path, body):
+        self._reply(200, {"method": method, "path": path, "body": body})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+@pytest.fixture
+def server(serve, monkeypatch):
+    """Return a function starting a local server with a subclass of Handler,
+    and returning its URL and the list of requests it received.
+    """
+    monkeypatch.setenv("ECMWF_API_HTTP2", "0")
+    monkeypatch.setenv("ECMWF_API_RATE_LIMIT", "0")
+    monkeypatch.setenv("ECMWF_API_MAX_RETRIES", "1")
+    monkeypatch.setattr(api.time, "sleep", lambda delay: None)
+    for name in ("http_proxy", "https_proxy", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.upper(), raising=False)
+    # Start each test with an empty pool
+    monkeypatch.setattr(api.Connection, "_local", threading.local())
+
+    def server(handler=Handler):
+        requests = []
+        url = serve(type("Handler", (handler,), {"requests": requests}))
+        return url, requests
+
+    return server
+
+
+def connection(url):
+    return api.Connection(url, email="e", key="k")
+
+
+def test_connection_reused(server):
+    url, requests = server()
+    conn = connection(url)
+    conn.call(url + "/a")
+    conn.call(url + "/b", {"x": 1}, "POST")
+    # Other Connection objects share the pool of the thread
+    connection(url).call(url + "/c")
+
+    assert len(set(port for _, _, _, port in requests)) == 1
+    assert len(conn._pool) == 1
+
+
+class ClosingHandler(Handler):
+    """Close the connection after each response, without telling the
+    client, as servers do with idle keep-alive connections.
+    """
+
+    def answer(self, method, path, body):
+        Handler.answer(self, method, path, body)
+        self.close_connection = True
+
+
+def test_resent_on_closed_connection(server):
+    url, requests = server(ClosingHandler)
+    conn = connection(url)
+    conn.call(url + "/a")
+    # Let the server close the connection
+    time.sleep(0.2)
+    assert conn.call(url + "/b")["path"] == "/b"
+    assert [path.split("?")[0] for _, path, _, _ in requests] == ["/a", "/b"]
+
+
+class DroppingHandler(Handler):
+    """Read each request, then close the connection without answering."""
+
+    def answer(self, method, path, body):
+        self.close_connection = True
+
+
+def test_dropped_response(server):
+    url, requests = server(DroppingHandler)
+    conn = connection(url)
+    # Failing to get a response, a GET is sent again once, while a POST the
+    # server may have acted upon is left to robust(), here allowed a single
+    # attempt
+    for method, payload, sent in (("GET", None, 2), ("POST", {"x": 1}, 1)):
+        del requests[:]
+        with pytest.raises((api.URLError, api.BadStatusLine)):
+            conn.call(url + "/a", payload, method)
+        assert [m for m, _, _, _ in requests] == [method] * sent
+
+
+class RedirectingHandler(Handler):
+    def answer(self, method, path, body):
+        if path in ("/moved", "/found"):
+            code = 301 if path == "/moved" else 302
+            self._reply(code, headers=[("Location", "/new")])
+        elif path == "/other":
+            self._reply(303, {"href": "/result"}, [("Location", "/result")])
+        else:
+            Handler.answer(self, method, path, body)
+
+
+def test_redirect_reposts(server):
+    url, requests = server(RedirectingHandler)
+    conn = connection(url)
+    for path in ("/moved", "/found"):
+        value = conn.call(url + path, {"x": 1}, "POST")
+        assert (value["method"], value["path"]) == ("POST", "/new")
+        assert json.loads(value["body"]) == {"x": 1}
+
+
+def test_redirect_303_returned(server):
+    url, requests = server(RedirectingHandler)
+    conn = connection(url)
+    conn.call(url + "/other", {"x": 1}, "POST")
+    assert conn.done
+    assert conn.value == {"href": "/result"}
+    # The Location of a 303 is left to the caller
+    assert len(requests) == 1
+
+
+def proxy_authorization(user, password):
+    credentials = ("%s:%s" % (user, password)).encode("utf-8")
+    return "Basic %s" % (base64.b64encode(credentials).decode("ascii"),)
+
+
+def test_http_proxy(server, monkeypatch):
+    proxy, requests = server()
+    monkeypatch.setenv("http_proxy", proxy.replace("://", "://user:p%40ss@"))
+    conn = connection("http://api.example.invalid/v1")
+    conn.call(conn.url + "/who-am-i")
+    conn.call(conn.url + "/requests", {"x": 1}, "POST")
+
+    for method, path, headers, _ in requests:
+        # Requests to a proxy give the full URL
+        assert path.startswith("http://api.example.invalid/v1/")
+        assert headers["Proxy-Authorization"] == proxy_authorization("user", "p@ss")
+        assert headers["X-ECMWF-KEY"] == "k"
+
+
+def test_http_proxy_bypassed(server, monkeypatch):
+    url, requests = server()
+    monkeypatch.setenv("http_proxy", "http://proxy.example.invalid:3128")
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+    conn = connection(url)
+    conn.call(url + "/a")
+    assert requests[0][1].startswith("/a?")
+
+
+class TunnelHandler(Handler):
+    def do_CONNECT(self):
+        self.requests.append(("CONNECT", self.path, dict(self.headers), None))
+        # Refuse the tunnel, as there is no TLS server behind it
+        self.send_response(403)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def test_https_proxy_tunnel(server, monkeypatch):
+    proxy, requests = server(TunnelHandler)
+    monkeypatch.setenv("https_proxy", proxy.replace("://", "://user:pass@"))
+    conn = connection("https://api.example.invalid/v1")
+    with pytest.raises(api.URLError):
+        conn.call(conn.url + "/who-am-i")
+
+    method, path, headers, _ = requests[0]
+    assert (method, path) == ("CONNECT", "api.example.invalid:443")
+    assert headers["Proxy-Authorization"] == proxy_authorization("user", "pass")
+    # Headers of the API are only sent through the tunnel
+    assert "X-ECMWF-KEY" not in headers
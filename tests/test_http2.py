@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from ecmwfapi import api
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    """Return a function making a Connection whose calls are answered by a
+    handler of httpx requests.
+    """
+    monkeypatch.setenv("ECMWF_API_MAX_RETRIES", "2")
+    monkeypatch.setenv("ECMWF_API_RATE_LIMIT", "0")
+    monkeypatch.setattr(api.time, "sleep", lambda delay: None)
+
+    def connection(handler):
+        conn = api.Connection("https://api.example.int/v1", email="e", key="k")
+        conn._http2 = httpx.Client(transport=httpx.MockTransport(handler))
+        return conn
+
+    return connection
+
+
+def test_response():
+    res = api._HTTPXResponse(
+        httpx.Response(202, headers={"Retry-After": "5"}, content=b"{}")
+    )
+    assert (res.status, res.reason) == (202, "Accepted")
+    assert res.getheader("retry-after") == "5"
+    assert res.msg.get("Retry-After") == "5"
+    assert res.getheader("Location", "none") == "none"
+    assert res.read() == b"{}"
+    res.close()
+
+
+def test_call(connection):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"uid": "u"})
+
+    conn = connection(handler)
+    assert conn.call(conn.url + "/who-am-i") == {"uid": "u"}
+    assert conn.call(conn.url + "/requests", {"a": 1}, "POST") == {"uid": "u"}
+
+    get, post = requests
+    assert get.method == "GET"
+    assert str(get.url) == "https://api.example.int/v1/who-am-i?offset=0&limit=500"
+    assert get.headers["X-ECMWF-KEY"] == "k"
+    assert post.method == "POST"
+    assert json.loads(post.content) == {"a": 1}
+    assert post.headers["Content-Type"] == "application/json"
+
+
+def test_redirect(connection):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.host == "api.example.int":
+            return httpx.Response(302, headers={"Location": "https://new.int/v1/r"})
+        return httpx.Response(200, json={"status": "complete"})
+
+    conn = connection(handler)
+    assert conn.call(conn.url + "/requests", {"a": 1}, "POST") == {"status": "complete"}
+    # Followed by hand, posting the data again
+    assert [r.method for r in requests] == ["POST", "POST"]
+    assert json.loads(requests[1].content) == {"a": 1}
+
+
+@pytest.mark.parametrize(
+    "error", [httpx.ConnectError("refused"), httpx.DecodingError("bad gzip")]
+)
+def test_errors_retried(connection, error):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            raise error
+        return httpx.Response(200, json={"uid": "u"})
+
+    conn = connection(handler)
+    assert conn.call(conn.url + "/who-am-i") == {"uid": "u"}
+    assert len(requests) == 2
+
+
+def test_errors_exhausted(connection):
+    def handler(request):
+        raise httpx.ReadTimeout("slow")
+
+    with pytest.raises(api.URLError):
+        connection(handler).call("/v1/who-am-i")
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setenv("ECMWF_API_HTTP2", "0")
+    assert api._http2_client() is None
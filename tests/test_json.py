@@ -0,0 +1,47 @@
+import json
+import math
+
+import pytest
+
+from ecmwfapi import api
+
+
+@pytest.fixture(params=["json", "orjson"])
+def backend(request):
+    if request.param == "json":
+        return api._json_dumps, json.loads
+    pytest.importorskip("orjson")
+    return api._orjson_dumps, api._orjson_loads
+
+
+def test_round_trip(backend):
+    dumps, loads = backend
+    value = {"date": "20200101", "step": [0, 6, 12], "grid": 0.25, "area": None}
+    data = dumps(value)
+    assert isinstance(data, bytes)
+    assert loads(data) == value
+
+
+def test_null(backend):
+    dumps, loads = backend
+    value = {"a": None, "b": "null"}
+    assert loads(dumps(value)) == value
+
+
+def test_non_finite_floats(backend):
+    dumps, loads = backend
+    assert b"NaN" in dumps({"a": float("nan")})
+    assert b"Infinity" in dumps({"a": float("inf")})
+    assert math.isnan(loads(b'{"a": NaN}')["a"])
+    assert loads(b'{"a": -Infinity}')["a"] == float("-inf")
+
+
+def test_non_string_keys(backend):
+    dumps, loads = backend
+    assert loads(dumps({1: "a", 2: "b"})) == {"1": "a", "2": "b"}
+
+
+def test_loads_error(backend):
+    _, loads = backend
+    with pytest.raises(ValueError):
+        loads(b"{not json")
@@ -0,0 +1,24 @@
+import json
+
+from ecmwfapi import api
+
+
+def test_poll_interval(monkeypatch):
+    slept = []
+    monkeypatch.setattr(api.time, "sleep", slept.append)
+
+    conn = api.Connection("http://api.example.int/v1", email="e", key="k")
+    conn.status = "queued"
+    statuses = iter(["queued"] * 5 + ["active"] * 2)
+
+    def call(url, payload=None, method="GET"):
+        body = json.dumps({"status": next(statuses)}).encode("utf-8")
+        where = ("http", "api.example.int", "/v1/requests/1")
+        return conn._process(where, 202, "Accepted", {"Retry-After": "5"}, body)
+
+    monkeypatch.setattr(conn, "call", call)
+    for _ in range(7):
+        conn.wait()
+
+    # Grows by half up to Retry-After, and is reset when the status changes
+    assert slept == [1.0, 1.5, 2.25, 3.375, 5.0, 5.0, 1.0]
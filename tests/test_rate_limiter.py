@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+
+from ecmwfapi import api
+from ecmwfapi.api import _RateLimiter
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def limiter(rate, window=60.0):
+    limiter = _RateLimiter(rate, window)
+    limiter._clock = Clock()
+    return limiter
+
+
+def test_window():
+    l = limiter(3, 10.0)
+    assert [l.reserve() for _ in range(3)] == [0, 0, 0]
+    # Wait for the oldest call to leave the window
+    assert l.reserve() == 10.0
+    l._clock.now += 4
+    assert l.reserve() == 6.0
+    l._clock.now += 6
+    # All three calls have left the window
+    assert [l.reserve() for _ in range(3)] == [0, 0, 0]
+    assert l.reserve() == 10.0
+
+
+def test_window_slides():
+    l = limiter(2, 10.0)
+    assert l.reserve() == 0
+    l._clock.now += 5
+    assert l.reserve() == 0
+    l._clock.now += 5
+    # Only the first call has left the window
+    assert l.reserve() == 0
+    assert l.reserve() == 5.0
+
+
+def test_429_halves_rate():
+    l = limiter(8)
+    l.update(429, {})
+    assert l.rate == 4
+    l.update(429, {})
+    l.update(429, {})
+    l.update(429, {})
+    assert l.rate == 1
+
+
+def test_rate_grows_back():
+    l = limiter(8)
+    l.update(429, {})
+    assert l.rate == 4
+    for _ in range(4):
+        l.update(200, {})
+    assert l.rate == 5
+    for _ in range(100):
+        l.update(200, {})
+    assert l.rate == 8
+
+
+def test_rate_limit_header():
+    l = limiter(100)
+    l.update(200, {"X-RateLimit-Limit": "10"})
+    assert l.rate == l.max_rate == 10
+
+
+def test_reset_delay():
+    l = limiter(10)
+    l.update(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "30"})
+    assert l.reserve() == 30.0
+    l._clock.now += 30
+    assert l.reserve() == 0
+
+
+def test_reset_time_stamp():
+    l = limiter(10)
+    l.update(
+        200,
+        {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 30)},
+    )
+    assert 29 <= l.reserve() <= 30
+
+
+def test_bad_headers_ignored():
+    l = limiter(10)
+    l.update(200, {"X-RateLimit-Limit": "many", "X-RateLimit-Remaining": "0"})
+    assert l.rate == 10
+
+
+def test_acquire_sleeps(monkeypatch):
+    l = limiter(1, 10.0)
+    slept = []
+
+    def sleep(delay):
+        slept.append(delay)
+        l._clock.now += delay
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    l.acquire()
+    l.acquire()
+    assert slept == [10.0]
+
+
+def test_acquire_async(monkeypatch):
+    async_api = pytest.importorskip("ecmwfapi.async_api")
+    l = limiter(1, 10.0)
+    slept = []
+
+    async def sleep(delay):
+        slept.append(delay)
+        l._clock.now += delay
+
+    monkeypatch.setattr(async_api.asyncio, "sleep", sleep)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(async_api._acquire(l))
+        loop.run_until_complete(async_api._acquire(l))
+    finally:
+        loop.close()
+    assert slept == [10.0]
+
+
+def test_rate_limit_setting(monkeypatch):
+    monkeypatch.delenv("ECMWF_API_RATE_LIMIT", raising=False)
+    assert api.rate_limit() == 120
+    for value, expected in (("30", 30), ("0", 0), ("-1", -1), ("fast", 120)):
+        monkeypatch.setenv("ECMWF_API_RATE_LIMIT", value)
+        assert api.rate_limit() == expected
+
+
+def test_no_rate_limit(monkeypatch):
+    monkeypatch.setenv("ECMWF_API_RATE_LIMIT", "0")
+    l = api._rate_limiter("http://no-limit.invalid/v1", "k")
+    for _ in range(1000):
+        assert l.reserve() == 0
+    l.update(429, {})
+    l.acquire()
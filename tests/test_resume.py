@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from ecmwfapi import api
+
+
+def test_resumed():
+    headers = {"Content-Range": "bytes 100-199/200"}
+    assert api._resumed(206, headers, 100)
+    assert not api._resumed(206, headers, 50)
+    assert not api._resumed(200, headers, 100)
+    assert not api._resumed(206, {}, 100)
+    assert not api._resumed(206, {"Content-Range": "bytes */200"}, 100)
+
+
+def test_resume_failed_error():
+    e = api.ResumeFailedError(10, 20)
+    assert (e.size, e.expected) == (10, 20)
+    assert str(e) == "Transferred 10 bytes, expected 20"
+
+
+def write_part(target, data, size):
+    with open(target, "wb") as f:
+        f.write(data[:size])
+
+
+def read(target):
+    with open(target, "rb") as f:
+        return f.read()
+
+
+def test_transfer_resumes(data_server, data, api_request, tmp_path):
+    target = str(tmp_path / "target")
+    write_part(target, data, 1000)
+    assert api_request._transfer(data_server + "/data", target, len(data)) == len(data)
+    assert read(target) == data
+
+
+def test_transfer_restarts_if_not_resumed(data_server, data, api_request, tmp_path):
+    target = str(tmp_path / "target")
+    # A server ignoring Range sends the whole file again, which must not be
+    # appended to the part already downloaded
+    write_part(target, data, 1000)
+    assert api_request._transfer(data_server + "/norange", target, len(data)) == len(
+        data
+    )
+    assert read(target) == data
+
+
+def test_transfer_size_mismatch(data_server, data, api_request, tmp_path):
+    target = str(tmp_path / "target")
+    with pytest.raises(api.ResumeFailedError) as e:
+        api_request._transfer(data_server + "/data", target, len(data) + 5)
+    assert (e.value.size, e.value.expected) == (len(data), len(data) + 5)
+
+
+def test_async_transfer(data_server, data, tmp_path):
+    aiohttp = pytest.importorskip("aiohttp")
+    from ecmwfapi import async_api
+
+    async def transfer(url, target, size):
+        async with aiohttp.ClientSession() as session:
+            request = async_api.AsyncAPIRequest(session, data_server, "datasets/x")
+            return await request._transfer(url, target, size)
+
+    def run(url, target, size):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(transfer(url, target, size))
+        finally:
+            loop.close()
+
+    target = str(tmp_path / "target")
+    write_part(target, data, 1000)
+    assert run(data_server + "/data", target, len(data)) == len(data)
+    assert read(target) == data
+
+    write_part(target, data, 1000)
+    assert run(data_server + "/norange", target, len(data)) == len(data)
+    assert read(target) == data
+
+    with pytest.raises(api.ResumeFailedError):
+        run(data_server + "/data", str(tmp_path / "other"), len(data) + 5)
@@ -0,0 +1,53 @@
+import pytest
+
+from ecmwfapi import api
+
+
+def test_max_retries(monkeypatch):
+    monkeypatch.delenv("ECMWF_API_MAX_RETRIES", raising=False)
+    assert api.max_retries() == 10
+    for value, expected in (("3", 3), ("0", 1), ("-2", 1), ("abc", 10)):
+        monkeypatch.setenv("ECMWF_API_MAX_RETRIES", value)
+        assert api.max_retries() == expected
+
+
+def test_retry_delay_backs_off():
+    for attempt in range(8):
+        delay = api.retry_delay(attempt, None)
+        backoff = min(60.0, 2.0**attempt)
+        assert backoff <= delay <= backoff + 1.0
+
+
+def test_retry_delay_honours_retry_after():
+    error = api.RetryError(503, "", {"Retry-After": "30"})
+    assert 30 <= api.retry_delay(0, error) <= 31
+    # Never sooner than the backoff, whatever the server asked
+    error = api.RetryError(503, "", {"Retry-After": "0"})
+    assert 32 <= api.retry_delay(5, error) <= 33
+
+
+def test_retry_delay_ignores_dates():
+    error = api.RetryError(503, "", {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert api.retry_delay(0, error) <= 2.0
+
+
+def test_robust_gives_up(monkeypatch):
+    monkeypatch.setenv("ECMWF_API_MAX_RETRIES", "3")
+    monkeypatch.setattr(api.time, "sleep", lambda delay: None)
+
+    class Failing(object):
+        verbose = False
+        calls = 0
+
+        def log(self, message):
+            pass
+
+        @api.robust
+        def call(self):
+            self.calls += 1
+            raise api.RetryError(503, "", {})
+
+    failing = Failing()
+    with pytest.raises(api.RetryError):
+        failing.call()
+    assert failing.calls == 3
@@ -0,0 +1,56 @@
+import os
+
+from ecmwfapi.api import ECMWFDataServer
+
+
+def retrieve(url, request, force=False):
+    messages = []
+    server = ECMWFDataServer(url=url, key="k", email="e", log=messages.append)
+    server.retrieve(request, force)
+    return any("skipping transfer" in message for message in messages)
+
+
+def test_skip_complete_target(api_server, data, tmp_path):
+    url, _ = api_server
+    target = str(tmp_path / "target")
+    request = {"dataset": "x", "date": "20200101", "target": target}
+
+    assert not retrieve(url, request)
+    assert retrieve(url, request)
+    with open(target, "rb") as f:
+        assert f.read() == data
+
+
+def test_force(api_server, tmp_path):
+    url, _ = api_server
+    request = {"dataset": "x", "target": str(tmp_path / "target")}
+    retrieve(url, request)
+    assert not retrieve(url, request, force=True)
+
+
+def test_other_request_same_size(api_server, tmp_path):
+    url, _ = api_server
+    target = str(tmp_path / "target")
+    retrieve(url, {"dataset": "x", "date": "20200101", "target": target})
+    # A result of the same size does not make the target complete
+    assert not retrieve(url, {"dataset": "x", "date": "20200102", "target": target})
+
+
+def test_modified_target(api_server, tmp_path):
+    url, _ = api_server
+    request = {"dataset": "x", "target": str(tmp_path / "target")}
+    retrieve(url, request)
+    stat = os.stat(request["target"])
+    os.utime(request["target"], (stat.st_atime, stat.st_mtime + 10))
+    assert not retrieve(url, request)
+
+
+def test_target_of_other_origin(api_server, data, tmp_path):
+    url, _ = api_server
+    target = str(tmp_path / "target")
+    # Not downloaded by any earlier run, even though of the right size
+    with open(target, "wb") as f:
+        f.write(b"x" * len(data))
+    assert not retrieve(url, {"dataset": "x", "target": target})
+    with open(target, "rb") as f:
+        assert f.read() == data
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from ecmwfapi import api
+
+
+def test_split_ranges():
+    assert api._split_ranges(10, 3) == [(0, 3), (4, 7), (8, 9)]
+    assert api._split_ranges(7, 3) == [(0, 2), (3, 5), (6, 6)]
+    assert api._split_ranges(8, 1) == [(0, 7)]
+
+
+def test_split_ranges_cover_size():
+    for size in (1, 2, 99, 100, 101, 64 << 20):
+        for n in range(1, 9):
+            ranges = api._split_ranges(size, n)
+            assert len(ranges) <= n
+            assert ranges[0][0] == 0
+            assert ranges[-1][1] == size - 1
+            for (_, last), (first, _) in zip(ranges, ranges[1:]):
+                assert first == last + 1
+
+
+def test_parallel_transfer(data_server, data, api_request, tmp_path):
+    target = str(tmp_path / "target")
+    size = api_request._parallel_transfer(data_server + "/data", target, len(data))
+    assert size == len(data)
+    with open(target, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(target + ".part")
+
+
+def test_parallel_transfer_failed(data_server, data, api_request, tmp_path):
+    target = str(tmp_path / "target")
+    with pytest.raises(IOError):
+        api_request._parallel_transfer(data_server + "/norange", target, len(data))
+    # Nothing left that could pass for a complete download
+    assert not os.path.exists(target)
+    assert not os.path.exists(target + ".part")
+
+
+def test_parallel_transfer_used(data_server, data, api_request, tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "PARALLEL_TRANSFER_THRESHOLD", 1)
+    target = str(tmp_path / "target")
+    assert api_request._transfer(data_server + "/data", target, len(data)) == len(data)
+    with open(target, "rb") as f:
+        assert f.read() == data
+
+
+def test_write_all():
+    class ShortWrites(object):
+        def __init__(self):
+            self.data = b""
+
+        def write(self, buf):
+            self.data += bytes(buf[:3])
+            return min(3, len(buf))
+
+    f = ShortWrites()
+    api._write_all(f, memoryview(b"hello world"))
+    assert f.data == b"hello world"